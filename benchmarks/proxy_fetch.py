@@ -0,0 +1,200 @@
+"""
+Compares merge requests fetching by ProxyView with Gitlab REST and GraphQL
+API, using local linker and Gitlab stand-in. Cache is disabled, so every
+proxy request hits Gitlab stand-in.
+
+Usage:
+
+    poetry run python benchmarks/proxy_fetch.py \
+        --requests 2000 --concurrency 20
+"""
+import asyncio
+import time
+from typing import Any, Dict
+
+import argclass
+from aiohttp import ClientSession
+from aiomisc import entrypoint
+
+from yatracker_linker.replay import (
+    GitlabStandInService, percentile, run_local_linker,
+)
+
+
+class BenchmarkParser(argclass.Parser):
+    requests: int = argclass.Argument(default=2000, help=(
+        'Number of proxy requests for each fetch path'
+    ))
+    concurrency: int = argclass.Argument(default=20, help=(
+        'Number of simultaneous proxy requests'
+    ))
+    merge_requests: int = argclass.Argument(default=100, help=(
+        'Number of distinct merge requests requested'
+    ))
+
+
+def make_merge_request(project_path: str, iid: int) -> Dict[str, Any]:
+    """
+    Returns merge request in Gitlab REST API format, with fields and sizes
+    close to real ones.
+    """
+    web_url = f'https://gitlab.local/{project_path}/-/merge_requests/{iid}'
+    user = {
+        'id': 1,
+        'username': 'stand-in',
+        'name': 'Stand-in User',
+        'state': 'active',
+        'avatar_url': 'https://gitlab.local/uploads/-/system/user/avatar.png',
+        'web_url': 'https://gitlab.local/stand-in',
+    }
+    sha = 'c5feabde2d8cd023215af4d2ceeb7a64839fc428'
+    return {
+        'id': 100000 + iid,
+        'iid': iid,
+        'project_id': 1,
+        'title': f'TASK-{iid}: Stand-in merge request',
+        'description': 'Some job: TASK-1\n' * 150,
+        'state': 'opened',
+        'created_at': '1970-01-01T00:00:00.000Z',
+        'updated_at': '1970-01-01T00:00:00.000Z',
+        'merged_by': None,
+        'merge_user': None,
+        'merged_at': None,
+        'closed_by': None,
+        'closed_at': None,
+        'target_branch': 'master',
+        'source_branch': f'TASK-{iid}',
+        'user_notes_count': 12,
+        'upvotes': 0,
+        'downvotes': 0,
+        'author': user,
+        'assignees': [user],
+        'assignee': user,
+        'reviewers': [user, user],
+        'source_project_id': 1,
+        'target_project_id': 1,
+        'labels': ['backend', 'review'],
+        'draft': False,
+        'work_in_progress': False,
+        'milestone': None,
+        'merge_when_pipeline_succeeds': False,
+        'merge_status': 'can_be_merged',
+        'detailed_merge_status': 'mergeable',
+        'sha': sha,
+        'merge_commit_sha': None,
+        'squash_commit_sha': None,
+        'discussion_locked': None,
+        'should_remove_source_branch': None,
+        'force_remove_source_branch': True,
+        'reference': f'!{iid}',
+        'references': {
+            'short': f'!{iid}',
+            'relative': f'!{iid}',
+            'full': f'{project_path}!{iid}',
+        },
+        'web_url': web_url,
+        'time_stats': {
+            'time_estimate': 0,
+            'total_time_spent': 0,
+            'human_time_estimate': None,
+            'human_total_time_spent': None,
+        },
+        'squash': False,
+        'task_completion_status': {'count': 0, 'completed_count': 0},
+        'has_conflicts': False,
+        'blocking_discussions_resolved': True,
+        'subscribed': False,
+        'changes_count': '12',
+        'latest_build_started_at': '1970-01-01T00:00:00.000Z',
+        'latest_build_finished_at': '1970-01-01T00:00:00.000Z',
+        'first_deployed_to_production_at': None,
+        'pipeline': {
+            'id': 1, 'iid': 1, 'project_id': 1, 'sha': sha,
+            'ref': f'TASK-{iid}', 'status': 'success', 'source': 'push',
+            'created_at': '1970-01-01T00:00:00.000Z',
+            'updated_at': '1970-01-01T00:00:00.000Z',
+            'web_url': f'https://gitlab.local/{project_path}/-/pipelines/1',
+        },
+        'head_pipeline': {
+            'id': 1, 'iid': 1, 'project_id': 1, 'sha': sha,
+            'ref': f'TASK-{iid}', 'status': 'success', 'source': 'push',
+            'created_at': '1970-01-01T00:00:00.000Z',
+            'updated_at': '1970-01-01T00:00:00.000Z',
+            'web_url': f'https://gitlab.local/{project_path}/-/pipelines/1',
+            'before_sha': sha, 'tag': False, 'yaml_errors': None,
+            'user': user, 'started_at': '1970-01-01T00:00:00.000Z',
+            'finished_at': '1970-01-01T00:00:00.000Z',
+            'committed_at': None, 'duration': 300, 'queued_duration': 1.5,
+            'coverage': '85.00',
+            'detailed_status': {
+                'icon': 'status_success', 'text': 'passed',
+                'label': 'passed', 'group': 'success',
+                'tooltip': 'passed', 'has_details': True,
+                'details_path': f'/{project_path}/-/pipelines/1',
+                'illustration': None,
+                'favicon': '/assets/ci_favicons/favicon_status_success.png',
+            },
+        },
+        'diff_refs': {
+            'base_sha': sha, 'head_sha': sha, 'start_sha': sha,
+        },
+        'merge_error': None,
+        'first_contribution': False,
+        'user': {'can_merge': True},
+    }
+
+
+class RealisticGitlabStandInService(GitlabStandInService):
+    def get_merge_request(
+        self, project_path: str, iid: int
+    ) -> Dict[str, Any]:
+        return make_merge_request(project_path, iid)
+
+
+async def benchmark(parser: BenchmarkParser, graphql: bool) -> str:
+    latencies = []
+    semaphore = asyncio.Semaphore(parser.concurrency)
+
+    async with run_local_linker(
+        graphql=graphql,
+        cache_ttl=0,
+        gitlab_stand_in=RealisticGitlabStandInService
+    ) as linker, ClientSession() as session:
+        async def get(index: int):
+            iid = index % parser.merge_requests + 1
+            url = linker.url.with_path(
+                f'/group/project/-/merge_requests/{iid}'
+            )
+            async with semaphore:
+                started_at = time.monotonic()
+                async with session.get(url) as resp:
+                    resp.raise_for_status()
+                    await resp.read()
+                latencies.append(time.monotonic() - started_at)
+
+        started_at = time.monotonic()
+        await asyncio.gather(*[get(index) for index in range(parser.requests)])
+        duration = time.monotonic() - started_at
+
+    return (
+        f'{"GraphQL" if graphql else "REST":>8}: '
+        f'{parser.requests / duration:.1f} requests/s, '
+        f'latency p50: {percentile(latencies, 0.5) * 1000:.1f}ms, '
+        f'p99: {percentile(latencies, 0.99) * 1000:.1f}ms, '
+        f'gitlab requests: {linker.gitlab.requests}, '
+        f'gitlab bytes per proxy request: '
+        f'{linker.gitlab.sent_bytes / parser.requests:.0f}'
+    )
+
+
+async def main(parser: BenchmarkParser):
+    for graphql in (False, True):
+        print(await benchmark(parser, graphql))
+
+
+if __name__ == '__main__':
+    parser = BenchmarkParser()
+    parser.parse_args()
+
+    with entrypoint(log_level='warning') as loop:
+        loop.run_until_complete(main(parser))
@@ -0,0 +1,119 @@
+import json
+
+from yatracker_linker.capture import REDACTED, CaptureWriter, read_capture
+from yatracker_linker.replay import ReplayParser, replay, run_local_linker
+
+
+EVENT = {
+    'object_kind': 'push',
+    'project': {'path_with_namespace': 'alvassin/example'},
+    'user_email': 'user@example.com',
+    'commits': [{
+        'message': 'RESP-1',
+        'title': 'Example commit',
+        'url': 'http://gitlab.local/alvassin/example/-/commit/c5feabde',
+        'author': {'email': 'user@example.com'},
+    }]
+}
+
+
+async def test_capture_redacts_headers_and_fields(tmp_path):
+    path = tmp_path / 'capture.ndjson.gz'
+    async with CaptureWriter(
+        path,
+        redact_headers=frozenset(['X-Custom']),
+        redact_fields=frozenset(['email', 'user_email'])
+    ) as writer:
+        writer.record(
+            {
+                'X-Gitlab-Token': 'secret',
+                'X-Gitlab-Event': 'Push Hook',
+                'X-Custom': 'secret',
+            },
+            json.dumps(EVENT).encode()
+        )
+
+    records = [record async for record in read_capture(path)]
+    assert len(records) == 1
+    assert records[0].headers == {
+        'X-Gitlab-Token': REDACTED,
+        'X-Gitlab-Event': 'Push Hook',
+        'X-Custom': REDACTED,
+    }
+
+    body = json.loads(records[0].body)
+    assert body['user_email'] == REDACTED
+    assert body['commits'][0]['author']['email'] == REDACTED
+    assert body['commits'][0]['message'] == 'RESP-1'
+
+
+async def test_capture_sampling(tmp_path):
+    writer = CaptureWriter(tmp_path / 'capture.ndjson.gz', sample_rate=0)
+    assert not writer.should_record()
+
+
+async def test_replay_with_local_linker(tmp_path):
+    path = tmp_path / 'capture.ndjson.gz'
+    async with CaptureWriter(path) as writer:
+        for _ in range(3):
+            writer.record(
+                {'Content-Type': 'application/json'},
+                json.dumps(EVENT).encode()
+            )
+
+    parser = ReplayParser()
+    parser.parse_args(['--capture', str(path), '--speed', '0'])
+    report = await replay(parser)
+
+    assert report.events == 3
+    assert report.errors == 0
+    assert report.throughput > 0
+
+
+async def test_replay_with_target(tmp_path):
+    path = tmp_path / 'capture.ndjson.gz'
+    async with CaptureWriter(path) as writer:
+        writer.record(
+            {'Content-Type': 'application/json'}, json.dumps(EVENT).encode()
+        )
+
+    async with run_local_linker() as linker:
+        parser = ReplayParser()
+        parser.parse_args([
+            '--capture', str(path),
+            '--speed', '0',
+            '--target', str(linker.events_url),
+        ])
+        report = await replay(parser)
+
+    assert report.events == 1
+    assert report.errors == 0
+    # Replay does not share event loop with linker, its lag is not reported
+    assert not report.loop_lags
+    assert 'loop lag' not in str(report)
+
+
+async def test_capture_drops_events_when_queue_is_full(tmp_path):
+    path = tmp_path / 'capture.ndjson.gz'
+    async with CaptureWriter(path, max_queue_size=1) as writer:
+        # Writer task has no chance to take events from queue in between
+        writer.record({}, b'{"first": true}')
+        writer.record({}, b'{"second": true}')
+
+    records = [record async for record in read_capture(path)]
+    assert [record.body for record in records] == ['{"first": true}']
+
+
+async def test_read_truncated_capture(tmp_path):
+    path = tmp_path / 'capture.ndjson.gz'
+    async with CaptureWriter(path, flush_records=2) as writer:
+        for index in range(3):
+            writer.record({}, json.dumps({'index': index}).encode())
+
+    # Linker was killed before gzip stream trailer was written
+    path.write_bytes(path.read_bytes()[:-5])
+
+    records = [record async for record in read_capture(path)]
+    assert [json.loads(record.body) for record in records] == [
+        {'index': 0}, {'index': 1}, {'index': 2},
+    ]
@@ -0,0 +1,142 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from aiohttp import ClientSession
+
+from yatracker_linker.link_scheduler import LinkScheduler
+from yatracker_linker.replay import run_local_linker
+from yatracker_linker.views.base import GITLAB_TOKEN_HEADER
+from yatracker_linker.views.stats import LinkStatsView
+
+
+class FakeTrackerClient:
+    def __init__(self):
+        self.linked = []
+
+    async def link_issue(self, key: str, remote_path: str) -> bool:
+        await asyncio.sleep(0)
+        self.linked.append(key)
+        return True
+
+
+async def test_bulk_push_does_not_starve_other_projects():
+    st_client = FakeTrackerClient()
+    scheduler = LinkScheduler(
+        st_client=st_client,  # type: ignore
+        concurrency=1
+    )
+
+    bulk = [
+        scheduler.link_issue(f'BULK-{i}', 'path', 'group/bulk', 'push')
+        for i in range(10)
+    ]
+    other = [
+        scheduler.link_issue('MR-1', 'path', 'group/other', 'merge_request'),
+        scheduler.link_issue('PUSH-1', 'path', 'group/other', 'push'),
+    ]
+    results = await asyncio.gather(*bulk, *other)
+
+    assert all(results)
+    assert len(st_client.linked) == 12
+    assert st_client.linked.index('MR-1') < 2
+    assert st_client.linked.index('PUSH-1') < 4
+
+
+async def test_merge_requests_prioritized_over_pushes():
+    st_client = FakeTrackerClient()
+    scheduler = LinkScheduler(
+        st_client=st_client,  # type: ignore
+        concurrency=1
+    )
+
+    await asyncio.gather(*[
+        scheduler.link_issue(f'PUSH-{i}', 'path', 'group/project', 'push')
+        for i in range(8)
+    ], *[
+        scheduler.link_issue(
+            f'MR-{i}', 'path', 'group/project', 'merge_request'
+        )
+        for i in range(4)
+    ])
+
+    # With weight 4 all merge request links are sent before the second push
+    # link is
+    assert st_client.linked.index('MR-3') < st_client.linked.index('PUSH-2')
+
+
+async def test_concurrency_and_statistic():
+    running = 0
+    max_running = 0
+
+    class SlowTrackerClient:
+        async def link_issue(self, key: str, remote_path: str) -> bool:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return True
+
+    scheduler = LinkScheduler(
+        st_client=SlowTrackerClient(),  # type: ignore
+        concurrency=3
+    )
+    await asyncio.gather(*[
+        scheduler.link_issue(f'TASK-{i}', 'path', 'group/project', 'push')
+        for i in range(10)
+    ])
+
+    assert max_running == 3
+    statistic = scheduler.statistic['group/project', 'push']
+    assert statistic.sent == 10
+    assert statistic.queued == 0
+    assert statistic.delay_max > 0
+
+
+async def test_cancelled_link_releases_slot():
+    scheduler = LinkScheduler(
+        st_client=FakeTrackerClient(),  # type: ignore
+        concurrency=1
+    )
+    first = asyncio.create_task(
+        scheduler.link_issue('TASK-1', 'path', 'group/project', 'push')
+    )
+    second = asyncio.create_task(
+        scheduler.link_issue('TASK-2', 'path', 'group/project', 'push')
+    )
+    await asyncio.sleep(0)
+    second.cancel()
+
+    assert await first
+    assert await scheduler.link_issue(
+        'TASK-3', 'path', 'group/project', 'push'
+    )
+
+
+@pytest.mark.parametrize('weights,concurrency', [
+    ({'push': 0}, 1),
+    ({'merge_request': -1}, 1),
+    (None, 0),
+])
+def test_invalid_settings(weights, concurrency):
+    with pytest.raises(ValueError):
+        LinkScheduler(
+            st_client=FakeTrackerClient(),  # type: ignore
+            concurrency=concurrency,
+            weights=weights
+        )
+
+
+@pytest.mark.parametrize('headers,expected_status', [
+    ({}, HTTPStatus.UNAUTHORIZED),
+    ({GITLAB_TOKEN_HEADER: 'invalid'}, HTTPStatus.UNAUTHORIZED),
+    ({GITLAB_TOKEN_HEADER: 'token'}, HTTPStatus.OK),
+])
+async def test_stats_authorization(headers, expected_status):
+    async with run_local_linker(
+        gitlab_tokens=frozenset(['token'])
+    ) as linker, ClientSession() as session:
+        url = linker.url.with_path(LinkStatsView.URL_PATH)
+        async with session.get(url, headers=headers) as resp:
+            assert resp.status == expected_status
@@ -0,0 +1,152 @@
+from unittest.mock import patch
+
+import pytest
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+from aiohttp.web import Application, Request, json_response
+
+from yatracker_linker.gitlab_client import NEXT_PAGE_HEADER, GitlabClient
+from yatracker_linker.merge_request_cache import MergeRequestCache
+from yatracker_linker.service import MergeRequestWarmerService
+
+
+PROJECT_PATH = 'alvassin/example'
+
+
+def make_merge_request(iid: int, state: str = 'opened'):
+    return {
+        'iid': iid,
+        'title': f'Merge request {iid}',
+        'description': 'Large description\n' * 100,
+        'author': {'id': 1, 'username': 'alvassin'},
+        'updated_at': '2023-04-01T00:00:00.000Z',
+        'state': state,
+    }
+
+
+def get_cached(iid: int, state: str = 'opened'):
+    return {
+        'title': f'Merge request {iid}',
+        'author': {'username': 'alvassin'},
+        'updated_at': '2023-04-01T00:00:00.000Z',
+        'state': state,
+    }
+
+
+def test_cache_get_put():
+    cache = MergeRequestCache(ttl=60, max_size=10)
+    assert cache.get(PROJECT_PATH, '1') is None
+
+    # Only fields used by proxy are stored
+    cache.put(PROJECT_PATH, 1, make_merge_request(1))
+    assert cache.get(PROJECT_PATH, '1') == get_cached(1)
+
+
+def test_cache_evict():
+    cache = MergeRequestCache(ttl=60, max_size=10)
+    cache.put(PROJECT_PATH, 1, make_merge_request(1))
+    cache.evict(PROJECT_PATH, '1')
+    assert cache.get(PROJECT_PATH, '1') is None
+
+
+def test_cache_skips_items_fetched_before_eviction():
+    cache = MergeRequestCache(ttl=60, max_size=1)
+    generation = cache.generation
+
+    # Merge request was changed while it was fetched
+    cache.evict(PROJECT_PATH, '1')
+    cache.put(PROJECT_PATH, '1', make_merge_request(1), generation)
+    assert cache.get(PROJECT_PATH, '1') is None
+
+    # Other merge requests are not affected
+    cache.put(PROJECT_PATH, '2', make_merge_request(2), generation)
+    assert cache.get(PROJECT_PATH, '2') == get_cached(2)
+
+    # Eviction is forgotten, item is skipped as it may be outdated
+    cache.evict(PROJECT_PATH, '3')
+    cache.put(PROJECT_PATH, '1', make_merge_request(1), generation)
+    assert cache.get(PROJECT_PATH, '1') is None
+
+    cache.put(PROJECT_PATH, '1', make_merge_request(1), cache.generation)
+    assert cache.get(PROJECT_PATH, '1') == get_cached(1)
+
+
+def test_cache_ttl():
+    cache = MergeRequestCache(ttl=60, max_size=10)
+    with patch('yatracker_linker.merge_request_cache.monotonic') as monotonic:
+        monotonic.return_value = 0
+        cache.put(PROJECT_PATH, '1', make_merge_request(1))
+
+        monotonic.return_value = 61
+        assert cache.get(PROJECT_PATH, '1') is None
+        assert len(cache) == 0
+
+
+def test_cache_evicts_oldest_items():
+    cache = MergeRequestCache(ttl=60, max_size=2)
+    cache.put(PROJECT_PATH, '1', make_merge_request(1))
+    cache.put(PROJECT_PATH, '2', make_merge_request(2))
+    cache.put(PROJECT_PATH, '1', make_merge_request(1))
+    cache.put(PROJECT_PATH, '3', make_merge_request(3))
+
+    assert len(cache) == 2
+    assert cache.get(PROJECT_PATH, '2') is None
+    assert cache.get(PROJECT_PATH, '1') == get_cached(1)
+    assert cache.get(PROJECT_PATH, '3') == get_cached(3)
+
+
+@pytest.fixture
+async def gitlab_server(aiomisc_unused_port_factory):
+    # Opened merge requests are returned in two pages, recently merged and
+    # closed merge requests in a single one
+    pages = {
+        ('opened', '1'): ([make_merge_request(1), make_merge_request(2)], '2'),
+        ('opened', '2'): ([make_merge_request(3)], ''),
+        ('merged', '1'): ([make_merge_request(4, 'merged')], ''),
+        ('closed', '1'): ([make_merge_request(5, 'closed')], ''),
+    }
+
+    async def handler(request: Request):
+        request.app['requests'].append(request.query)
+        items, next_page = pages[
+            request.query['state'], request.query['page']
+        ]
+        return json_response(items, headers={NEXT_PAGE_HEADER: next_page})
+
+    app = Application()
+    app['requests'] = []
+    app.router.add_route(
+        'get', '/api/v4/projects/{project_id}/merge_requests', handler
+    )
+
+    server = TestServer(app, port=aiomisc_unused_port_factory())
+    await server.start_server()
+
+    try:
+        yield server
+    finally:
+        await server.close()
+
+
+async def test_warmer_prefetches_merge_requests(gitlab_server):
+    cache = MergeRequestCache(ttl=60, max_size=100)
+    async with ClientSession(raise_for_status=True) as session:
+        service = MergeRequestWarmerService(
+            interval=60,
+            projects=frozenset([PROJECT_PATH]),
+            gitlab_client=GitlabClient(
+                session=session,
+                url=gitlab_server.make_url('').with_path(''),
+                token='gitlab-secret'
+            ),
+            merge_request_cache=cache
+        )
+        await service.callback()
+
+    requests = gitlab_server.app['requests']
+    assert len(requests) == 4
+    assert all('updated_after' in query for query in requests[-2:])
+    for iid in range(1, 4):
+        assert cache.get(PROJECT_PATH, str(iid)) == get_cached(iid)
+    assert cache.get(PROJECT_PATH, '4') == get_cached(4, 'merged')
+    assert cache.get(PROJECT_PATH, '5') == get_cached(5, 'closed')
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+from aiohttp import ClientSession
+
+from yatracker_linker.replay import run_local_linker
+from yatracker_linker.views.events import LinkItem, ParsedEvent, parse_event
+
+
+COMMIT_PATH = 'alvassin/example/-/commit/c5feabde'
+
+PUSH_EVENT = {
+    'object_kind': 'push',
+    'project': {'path_with_namespace': 'alvassin/example'},
+    'commits': [{
+        'message': 'RESP-1',
+        'title': 'Example commit',
+        'url': f'http://gitlab.local/{COMMIT_PATH}',
+    }]
+}
+
+
+def test_parse_event():
+    assert parse_event(json.dumps(PUSH_EVENT).encode()) == ParsedEvent(
+        kind='push',
+        project_path='alvassin/example',
+        items_to_link=[LinkItem(path=COMMIT_PATH, issue='RESP-1')]
+    )
+
+
+def test_parse_unknown_event():
+    assert parse_event(b'{"object_kind": "tag_push"}') is None
+
+
+@pytest.mark.parametrize('parse_offload_threshold,parse_processes', [
+    # Inline
+    (1024 * 1024, 0),
+    # Thread pool
+    (0, 0),
+    # Process pool
+    (0, 1),
+])
+async def test_offload_parsing(parse_offload_threshold, parse_processes):
+    async with run_local_linker(
+        tracker_latency=0,
+        parse_offload_threshold=parse_offload_threshold,
+        parse_processes=parse_processes
+    ) as linker, ClientSession() as session:
+        async with session.post(linker.events_url, json=PUSH_EVENT) as resp:
+            assert await resp.json() == [
+                {'issue': 'RESP-1', 'path': COMMIT_PATH}
+            ]
+
+        async with session.post(linker.events_url, json={}) as resp:
+            assert resp.status == 400
+
+
+def test_parse_merge_request_event_iid():
+    event = parse_event(json.dumps({
+        'object_kind': 'merge_request',
+        'project': {'path_with_namespace': 'alvassin/example'},
+        'object_attributes': {
+            'iid': 1,
+            'description': '',
+            'source_branch': 'RESP-1',
+            'target_branch': 'master',
+            'title': 'Update README.md',
+            'url': 'http://gitlab.local/alvassin/example/-/merge_requests/1',
+            'last_commit': {
+                'message': 'Update README.md',
+                'title': 'Update README.md',
+                'url': f'http://gitlab.local/{COMMIT_PATH}',
+            }
+        }
+    }).encode())
+
+    # Used to evict merge request from proxy cache
+    assert event is not None
+    assert event.merge_request_iid == 1
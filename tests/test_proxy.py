@@ -0,0 +1,212 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from aiohttp import ClientResponseError, ClientSession
+
+from yatracker_linker.gitlab_client import GraphQLError, format_graphql_time
+from yatracker_linker.merge_request_loader import MergeRequestLoader
+from yatracker_linker.replay import run_local_linker
+
+
+MR_PATH = '/alvassin/example/-/merge_requests/{iid}'
+
+
+@pytest.mark.parametrize('graphql', [False, True])
+async def test_proxy_merge_request(graphql):
+    async with run_local_linker(graphql=graphql) as linker, \
+            ClientSession() as session:
+        url = linker.url.with_path(MR_PATH.format(iid=1))
+        async with session.get(url) as resp:
+            assert resp.status == HTTPStatus.OK
+            assert await resp.json() == {
+                'key': MR_PATH.format(iid=1),
+                'summary': 'TASK-1: Stand-in merge request',
+                'assignee': {'login': 'stand-in'},
+                'updated': '1970-01-01T00:00:00.000Z',
+                'resolution': {'name': 'unresolved'},
+                'status': {'name': 'opened'},
+            }
+
+
+async def test_graphql_batches_simultaneous_requests():
+    async with run_local_linker(graphql=True) as linker, \
+            ClientSession() as session:
+        async def get(iid: int):
+            url = linker.url.with_path(MR_PATH.format(iid=iid))
+            async with session.get(url) as resp:
+                return (await resp.json())['summary']
+
+        summaries = await asyncio.gather(*[get(iid) for iid in range(1, 6)])
+
+    assert summaries == [
+        f'TASK-{iid}: Stand-in merge request' for iid in range(1, 6)
+    ]
+    assert linker.gitlab.requests == 1
+
+
+async def test_merge_request_event_evicts_cache():
+    event = {
+        'object_kind': 'merge_request',
+        'project': {'path_with_namespace': 'alvassin/example'},
+        'object_attributes': {
+            'iid': 1,
+            'description': '',
+            'source_branch': 'TASK-1',
+            'target_branch': 'master',
+            'title': 'Update README.md',
+            'url': f'http://gitlab.local{MR_PATH.format(iid=1)}',
+            'last_commit': {
+                'message': 'Update README.md',
+                'title': 'Update README.md',
+                'url': 'http://gitlab.local/alvassin/example/-/commit/1',
+            }
+        }
+    }
+
+    async with run_local_linker() as linker, ClientSession() as session:
+        url = linker.url.with_path(MR_PATH.format(iid=1))
+        for _ in range(2):
+            async with session.get(url) as resp:
+                assert resp.status == HTTPStatus.OK
+        assert linker.gitlab.requests == 1
+
+        async with session.post(linker.events_url, json=event) as resp:
+            assert resp.status == HTTPStatus.OK
+
+        async with session.get(url) as resp:
+            assert resp.status == HTTPStatus.OK
+        assert linker.gitlab.requests == 2
+
+
+class FakeGitlabClient:
+    def __init__(self):
+        self.queries = []
+
+    async def get_merge_requests(self, merge_requests):
+        self.queries.append(merge_requests)
+        return {
+            (project_path, iid): {'iid': int(iid)}
+            for project_path, iids in merge_requests.items()
+            for iid in iids
+            if iid != '404'
+        }
+
+    async def get_merge_request(self, project_id, merge_request_id):
+        if merge_request_id == '404':
+            raise ClientResponseError(
+                None, (), status=HTTPStatus.NOT_FOUND  # type: ignore
+            )
+        return {'iid': int(merge_request_id)}
+
+
+class BrokenGraphQLGitlabClient(FakeGitlabClient):
+    def __init__(self):
+        super().__init__()
+        self.rest_requests = 0
+        self.max_rest_requests = 0
+
+    async def get_merge_requests(self, merge_requests):
+        self.queries.append(merge_requests)
+        raise GraphQLError([{'message': 'Query has complexity too high'}])
+
+    async def get_merge_request(self, project_id, merge_request_id):
+        self.rest_requests += 1
+        self.max_rest_requests = max(
+            self.max_rest_requests, self.rest_requests
+        )
+        try:
+            await asyncio.sleep(0.01)
+            return await super().get_merge_request(
+                project_id, merge_request_id
+            )
+        finally:
+            self.rest_requests -= 1
+
+
+async def test_loader():
+    gitlab_client = FakeGitlabClient()
+    loader = MergeRequestLoader(
+        gitlab_client,  # type: ignore
+        delay=0.01,
+        max_batch_size=3
+    )
+
+    results = await asyncio.gather(
+        loader.load('group/a', '1'),
+        loader.load('group/a', '1'),
+        loader.load('group/b', '404'),
+        loader.load('group/b', '2'),
+        loader.load('group/c', '3'),
+    )
+
+    assert results == [{'iid': 1}, {'iid': 1}, None, {'iid': 2}, {'iid': 3}]
+    # Duplicated merge requests are fetched once, batch is sent as soon as
+    # it is full
+    assert gitlab_client.queries == [
+        {'group/a': ['1'], 'group/b': ['404', '2']},
+        {'group/c': ['3']},
+    ]
+
+
+async def test_loader_max_batch_projects():
+    gitlab_client = FakeGitlabClient()
+    loader = MergeRequestLoader(
+        gitlab_client,  # type: ignore
+        delay=0.01,
+        max_batch_projects=2
+    )
+
+    results = await asyncio.gather(
+        loader.load('group/a', '1'),
+        loader.load('group/b', '2'),
+        loader.load('group/a', '3'),
+        loader.load('group/c', '4'),
+    )
+
+    assert results == [{'iid': 1}, {'iid': 2}, {'iid': 3}, {'iid': 4}]
+    assert gitlab_client.queries == [
+        {'group/a': ['1', '3'], 'group/b': ['2']},
+        {'group/c': ['4']},
+    ]
+
+
+async def test_loader_rest_fallback():
+    gitlab_client = BrokenGraphQLGitlabClient()
+    loader = MergeRequestLoader(
+        gitlab_client,  # type: ignore
+        delay=0.01
+    )
+
+    results = await asyncio.gather(
+        loader.load('group/a', '1'),
+        loader.load('group/a', '1'),
+        loader.load('group/b', '404'),
+    )
+
+    assert results == [{'iid': 1}, {'iid': 1}, None]
+    assert len(gitlab_client.queries) == 1
+
+
+async def test_loader_rest_fallback_concurrency():
+    gitlab_client = BrokenGraphQLGitlabClient()
+    loader = MergeRequestLoader(
+        gitlab_client,  # type: ignore
+        delay=0.01,
+        rest_concurrency=2
+    )
+
+    results = await asyncio.gather(*[
+        loader.load('group/a', str(iid)) for iid in range(1, 11)
+    ])
+
+    assert results == [{'iid': iid} for iid in range(1, 11)]
+    assert gitlab_client.max_rest_requests == 2
+
+
+@pytest.mark.parametrize('value,expected', [
+    ('1970-01-01T00:00:00Z', '1970-01-01T00:00:00.000Z'),
+    ('2023-04-01T15:00:00+03:00', '2023-04-01T12:00:00.000Z'),
+])
+def test_format_graphql_time(value, expected):
+    assert format_graphql_time(value) == expected
@@ -0,0 +1,160 @@
+import json
+from http import HTTPStatus
+from unittest.mock import patch
+
+import pytest
+from aiohttp import ClientSession
+
+from yatracker_linker.replay import run_local_linker
+from yatracker_linker.routing import (
+    GITLAB_EVENT_HEADER, PrefixTrie, RoutingRules, parse_project_queues,
+)
+from yatracker_linker.views.events import parse_event
+
+
+PUSH_EVENT = json.dumps({
+    'object_kind': 'push',
+    'user_username': 'alvassin',
+    'project': {'path_with_namespace': 'group/subgroup/project'},
+    'commits': [],
+}).encode()
+
+MERGE_REQUEST_EVENT = json.dumps({
+    'object_kind': 'merge_request',
+    'user': {'name': 'Bot', 'username': 'project_1_bot_f00d'},
+    'project': {'path_with_namespace': 'group/project'},
+    'object_attributes': {
+        'source': {'path_with_namespace': 'fork/project'},
+    },
+}).encode()
+
+
+def test_prefix_trie_longest_match():
+    trie = PrefixTrie([('group', 1), ('group/subgroup', 2)])
+    assert trie.match('group/project') == 1
+    assert trie.match('group/subgroup/project') == 2
+    assert trie.match('group/subgroup-2/project') == 1
+    assert trie.match('other/project') is None
+
+
+@pytest.mark.parametrize('rules,headers,body,rejected', [
+    # Empty rules accept everything
+    (RoutingRules(), {}, PUSH_EVENT, False),
+
+    # Event kinds are checked using header only
+    (
+        RoutingRules(event_kinds=frozenset(['push'])),
+        {GITLAB_EVENT_HEADER: 'Tag Push Hook'}, b'', True
+    ),
+    (
+        RoutingRules(event_kinds=frozenset(['push'])),
+        {GITLAB_EVENT_HEADER: 'Push Hook'}, PUSH_EVENT, False
+    ),
+
+    # Projects
+    (
+        RoutingRules(ignore_projects=frozenset(['group/subgroup'])),
+        {}, PUSH_EVENT, True
+    ),
+    (
+        RoutingRules(
+            projects=frozenset(['group']),
+            ignore_projects=frozenset(['group/subgroup'])
+        ),
+        {}, MERGE_REQUEST_EVENT, False
+    ),
+    (RoutingRules(projects=frozenset(['other'])), {}, PUSH_EVENT, True),
+
+    # Authors
+    (
+        RoutingRules(ignore_authors=frozenset(['alvassin'])),
+        {GITLAB_EVENT_HEADER: 'Push Hook'}, PUSH_EVENT, True
+    ),
+    (
+        RoutingRules(ignore_bots=True),
+        {GITLAB_EVENT_HEADER: 'Merge Request Hook'}, MERGE_REQUEST_EVENT, True
+    ),
+    (RoutingRules(ignore_bots=True), {}, PUSH_EVENT, False),
+])
+def test_get_rejection_reason(rules, headers, body, rejected):
+    assert bool(rules.get_rejection_reason(headers, body)) == rejected
+
+
+@pytest.mark.parametrize('username,ignored', [
+    ('project_12_bot', True),
+    ('project_12_bot1', True),
+    ('group_12_bot_f00d', True),
+    ('project_12_robot', False),
+    ('alvassin', False),
+])
+def test_is_bot_ignored(username, ignored):
+    rules = RoutingRules(ignore_bots=True)
+    assert rules.is_author_ignored(username) == ignored
+
+
+def test_is_issue_allowed():
+    rules = RoutingRules(
+        project_queues=parse_project_queues(['group=task,bug'])
+    )
+    assert rules.is_issue_allowed('group/project', 'TASK-1')
+    assert not rules.is_issue_allowed('group/project', 'OTHER-1')
+    assert rules.is_issue_allowed('other/project', 'OTHER-1')
+
+
+def test_parse_project_queues_invalid():
+    with pytest.raises(ValueError):
+        parse_project_queues(['group'])
+
+
+def make_push_event(*messages: str) -> dict:
+    return {
+        'object_kind': 'push',
+        'user_username': 'alvassin',
+        'project': {'path_with_namespace': 'group/project'},
+        'commits': [
+            {
+                'message': message,
+                'title': message,
+                'url': f'http://gitlab.local/group/project/-/commit/{index}',
+            }
+            for index, message in enumerate(messages)
+        ],
+    }
+
+
+async def test_gitlab_view_rejects_event():
+    rules = RoutingRules(ignore_authors=frozenset(['alvassin']))
+    async with run_local_linker(routing_rules=rules) as linker, \
+            ClientSession() as session:
+        with patch(
+            'yatracker_linker.views.events.parse_event', wraps=parse_event
+        ) as parse_event_mock:
+            async with session.post(
+                linker.events_url,
+                json=make_push_event('TASK-1'),
+                headers={GITLAB_EVENT_HEADER: 'Push Hook'}
+            ) as resp:
+                assert resp.status == HTTPStatus.OK
+                assert await resp.json() == []
+
+        parse_event_mock.assert_not_called()
+        assert linker.tracker.requests == 0
+
+
+async def test_gitlab_view_filters_project_queues():
+    rules = RoutingRules(
+        project_queues={'group': frozenset(['TASK'])}
+    )
+    async with run_local_linker(routing_rules=rules) as linker, \
+            ClientSession() as session:
+        async with session.post(
+            linker.events_url,
+            json=make_push_event('TASK-1', 'OTHER-2'),
+            headers={GITLAB_EVENT_HEADER: 'Push Hook'}
+        ) as resp:
+            assert resp.status == HTTPStatus.OK
+            assert [
+                item['issue'] for item in await resp.json()
+            ] == ['TASK-1']
+
+        assert linker.tracker.requests == 1
@@ -6,7 +6,7 @@ from aiomisc_log import basic_config
 
 from yatracker_linker.args import Parser
 from yatracker_linker.deps import config_deps
-from yatracker_linker.service import HttpService
+from yatracker_linker.service import HttpService, MergeRequestWarmerService
 
 
 def main():
@@ -27,10 +27,22 @@ def main():
         HttpService(
             address=parser.address,
             port=parser.port,
-            gitlab_tokens=parser.gitlab.incoming_token
+            gitlab_tokens=parser.gitlab.incoming_token,
+            parse_offload_threshold=parser.parse.offload_threshold,
+            client_max_size=parser.client_max_size
         )
     ]
 
+    if parser.cache.projects:
+        services.append(
+            MergeRequestWarmerService(
+                interval=parser.cache.interval,
+                projects=parser.cache.projects,
+                concurrency=parser.cache.concurrency,
+                updated_within=parser.cache.updated_within
+            )
+        )
+
     if parser.sentry.dsn:
         services.append(
             RavenSender(
@@ -1,9 +1,15 @@
-from typing import Optional
+from pathlib import Path
+from typing import Dict, Optional
 
 import argclass
 from aiomisc_log import LogFormat
 from yarl import URL
 
+from yatracker_linker.link_scheduler import (
+    DEFAULT_CONCURRENCY, DEFAULT_WEIGHTS,
+)
+from yatracker_linker.routing import parse_project_queues
+
 
 class SentryGroup(argclass.Group):
     dsn: Optional[URL]
@@ -14,6 +20,23 @@ class TrackerGroup(argclass.Group):
     url: URL
     token: str
     link_origin: str
+    link_concurrency: int = argclass.Argument(
+        default=DEFAULT_CONCURRENCY, help=(
+            'Maximum number of simultaneous link requests to Tracker. When '
+            'links are queued, every (project, event kind) pair gets share '
+            'of requests proportional to its weight'
+        )
+    )
+    merge_request_weight: float = argclass.Argument(
+        default=DEFAULT_WEIGHTS['merge_request'], help=(
+            'Positive weight of merge request event links'
+        )
+    )
+    push_weight: float = argclass.Argument(
+        default=DEFAULT_WEIGHTS['push'], help=(
+            'Positive weight of push event links'
+        )
+    )
 
 
 class GitlabGroup(argclass.Group):
@@ -28,6 +51,112 @@ class GitlabGroup(argclass.Group):
         'Token used by linker to authenticate at gitlab to retrieve merge '
         'requests information'
     ))
+    graphql: bool = argclass.Argument(
+        action=argclass.Actions.STORE_TRUE, default=False, help=(
+            'Fetch merge requests with GraphQL API, requesting only fields '
+            'required by proxy and batching simultaneous requests'
+        )
+    )
+    graphql_batch_delay: float = argclass.Argument(default=0.005, help=(
+        'Seconds to collect merge requests into single GraphQL query'
+    ))
+
+
+class CacheGroup(argclass.Group):
+    ttl: float = argclass.Argument(default=120, help=(
+        'Seconds merge request information is kept in cache. Cached merge '
+        'request is evicted on merge request event, but changes without '
+        'such event (or with event ignored by routing rules) are shown in '
+        'Tracker with up to ttl seconds delay'
+    ))
+    size: int = argclass.Argument(default=10000, help=(
+        'Maximum number of merge requests kept in cache'
+    ))
+    projects: frozenset[str] = argclass.Argument(
+        type=str, nargs='*', converter=frozenset, help=(
+            'Gitlab projects (path with namespace) which merge requests are '
+            'prefetched into cache in background'
+        )
+    )
+    interval: float = argclass.Argument(default=60, help=(
+        'Seconds between merge requests prefetches'
+    ))
+    concurrency: int = argclass.Argument(default=4, help=(
+        'Maximum number of projects prefetched simultaneously'
+    ))
+    updated_within: float = argclass.Argument(default=86400, help=(
+        'Besides opened merge requests, also prefetch merge requests '
+        'updated within given number of seconds'
+    ))
+
+
+class CaptureGroup(argclass.Group):
+    path: Optional[Path] = argclass.Argument(type=Path, help=(
+        'Append incoming gitlab events to given gzip-compressed NDJSON file, '
+        'to replay them later with yatracker-linker-replay'
+    ))
+    sample_rate: float = argclass.Argument(default=1.0, help=(
+        'Fraction of incoming gitlab events written to capture file'
+    ))
+    redact_headers: frozenset[str] = argclass.Argument(
+        type=str, nargs='*', converter=frozenset, help=(
+            'Headers replaced in capture file, in addition to '
+            'authentication ones'
+        )
+    )
+    redact_fields: frozenset[str] = argclass.Argument(
+        type=str, nargs='*', converter=frozenset, help=(
+            'Event payload fields (at any nesting level) replaced in '
+            'capture file, e.g. email'
+        )
+    )
+
+
+class RoutingGroup(argclass.Group):
+    event_kinds: frozenset[str] = argclass.Argument(
+        type=str, nargs='*', converter=frozenset, help=(
+            'Event kinds to process (e.g. push, merge_request), other events '
+            'are ignored. All events are processed if not specified'
+        )
+    )
+    projects: frozenset[str] = argclass.Argument(
+        type=str, nargs='*', converter=frozenset, help=(
+            'Group or project paths to process events for. All projects are '
+            'processed if not specified'
+        )
+    )
+    ignore_projects: frozenset[str] = argclass.Argument(
+        type=str, nargs='*', converter=frozenset, help=(
+            'Group or project paths to ignore events for'
+        )
+    )
+    ignore_authors: frozenset[str] = argclass.Argument(
+        type=str, nargs='*', converter=frozenset, help=(
+            'Usernames to ignore events from'
+        )
+    )
+    ignore_bots: bool = argclass.Argument(
+        action=argclass.Actions.STORE_TRUE, default=False, help=(
+            'Ignore events from project and group access tokens bot users'
+        )
+    )
+    project_queues: Dict[str, frozenset[str]] = argclass.Argument(
+        type=str, nargs='*', converter=parse_project_queues, help=(
+            'Tracker queues issues could be linked in for group or project, '
+            'e.g. group/project=QUEUE1,QUEUE2'
+        )
+    )
+
+
+class ParseGroup(argclass.Group):
+    offload_threshold: int = argclass.Argument(default=256 * 1024, help=(
+        'Events larger than given number of bytes are decoded and validated '
+        'in executor instead of event loop thread'
+    ))
+    processes: int = argclass.Argument(default=0, help=(
+        'Number of processes to parse large events in. Thread pool is used '
+        'if 0, it only reduces event loop lag, as parsing still holds GIL'
+    ))
 
 
 class Parser(argclass.Parser):
@@ -38,7 +167,14 @@ class Parser(argclass.Parser):
     )
     address: str = argclass.Argument(default='0.0.0.0')
     port: int
+    client_max_size: int = argclass.Argument(default=32 * 1024 * 1024, help=(
+        'Maximum size of incoming request body in bytes'
+    ))
 
     gitlab = GitlabGroup(title='Gitlab options')
+    cache = CacheGroup(title='Merge requests cache options')
+    capture = CaptureGroup(title='Events capture options')
+    routing = RoutingGroup(title='Events routing options')
+    parse = ParseGroup(title='Events parsing options')
     sentry = SentryGroup(title='Sentry options')
     tracker = TrackerGroup(title='Tracker options')
@@ -0,0 +1,182 @@
+import asyncio
+import gzip
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Mapping, Optional, Tuple
+
+from aiomisc.io import AsyncTextIO, Compression, async_open
+
+
+log = logging.getLogger(__name__)
+
+REDACTED = '<redacted>'
+
+# Headers that are never written to capture file as is
+DEFAULT_REDACT_HEADERS = frozenset([
+    'authorization',
+    'cookie',
+    'x-gitlab-token',
+])
+
+
+@dataclass
+class CaptureRecord:
+    timestamp: float
+    headers: Dict[str, str]
+    body: str
+
+
+def redact_fields(obj: Any, fields: frozenset[str]) -> Any:
+    if isinstance(obj, dict):
+        return {
+            key: REDACTED if key in fields else redact_fields(value, fields)
+            for key, value in obj.items()
+        }
+
+    if isinstance(obj, list):
+        return [redact_fields(item, fields) for item in obj]
+
+    return obj
+
+
+class CaptureWriter:
+    """
+    Appends incoming webhook events to gzip-compressed NDJSON file, so they
+    could be replayed later with yatracker-linker-replay.
+
+    Events are queued and written by background task, serialization is
+    performed in executor, so recording does not delay responses. Compressed
+    stream is flushed when queue is drained or every flush_records events,
+    so file remains readable up to the last flush if linker is killed.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        sample_rate: float = 1.0,
+        redact_headers: frozenset[str] = frozenset(),
+        redact_fields: frozenset[str] = frozenset(),
+        max_queue_size: int = 1000,
+        flush_records: int = 100
+    ):
+        self._path = path
+        self._sample_rate = sample_rate
+        self._redact_headers = DEFAULT_REDACT_HEADERS | frozenset(
+            header.lower() for header in redact_headers
+        )
+        self._redact_fields = redact_fields
+        self._file: Optional[AsyncTextIO] = None
+        self._queue: asyncio.Queue[
+            Optional[Tuple[float, Dict[str, str], bytes]]
+        ] = asyncio.Queue(maxsize=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self._flush_records = flush_records
+
+    async def __aenter__(self) -> 'CaptureWriter':
+        self._file = async_open(self._path, 'a', compression=Compression.GZIP)
+        await self._file.open()
+        self._task = asyncio.create_task(self._write(self._file))
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self._task is not None:
+            # Write queued events before closing file
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+
+        if self._file is not None:
+            await self._file.close()
+            self._file = None
+
+    def should_record(self) -> bool:
+        return random.random() < self._sample_rate
+
+    def get_record(
+        self, timestamp: float, headers: Mapping[str, str], body: bytes
+    ) -> str:
+        text = body.decode(errors='replace')
+        if self._redact_fields:
+            try:
+                text = json.dumps(
+                    redact_fields(json.loads(text), self._redact_fields)
+                )
+            except ValueError:
+                pass
+
+        return json.dumps({
+            'timestamp': timestamp,
+            'headers': {
+                name: (
+                    REDACTED if name.lower() in self._redact_headers
+                    else value
+                )
+                for name, value in headers.items()
+            },
+            'body': text,
+        })
+
+    def record(self, headers: Mapping[str, str], body: bytes):
+        if self._task is None:
+            raise RuntimeError('Capture file is not opened')
+
+        try:
+            self._queue.put_nowait((time.time(), dict(headers), body))
+        except asyncio.QueueFull:
+            log.warning('Capture queue is full, event is not recorded')
+
+    async def _write(self, afp: AsyncTextIO):
+        loop = asyncio.get_running_loop()
+        unflushed = 0
+        while (item := await self._queue.get()) is not None:
+            try:
+                line = await loop.run_in_executor(None, self.get_record, *item)
+                await afp.write(line + '\n')
+                unflushed += 1
+
+                if self._queue.empty() or unflushed >= self._flush_records:
+                    # Gzip file performs sync flush, so everything written
+                    # so far could be decompressed without stream trailer
+                    await afp.flush()
+                    unflushed = 0
+            except Exception:
+                log.exception('Unable to write event to capture file')
+
+
+async def read_capture(path: Path) -> AsyncIterator[CaptureRecord]:
+    """
+    Reads records from capture file. If file is truncated (e.g. linker was
+    killed without closing it), records are read up to the last complete
+    line.
+    """
+    async with async_open(path, 'r', compression=Compression.GZIP) as afp:
+        while True:
+            try:
+                line = await afp.readline()
+            except (EOFError, gzip.BadGzipFile):
+                log.warning(
+                    'Capture file %s is truncated, records are read up to '
+                    'the last complete one', path
+                )
+                break
+
+            if not line:
+                break
+            if not line.endswith('\n'):
+                log.warning(
+                    'Capture file %s ends with incomplete record', path
+                )
+                break
+            if not line.strip():
+                continue
+
+            item = json.loads(line)
+            yield CaptureRecord(
+                timestamp=item['timestamp'],
+                headers=item['headers'],
+                body=item['body']
+            )
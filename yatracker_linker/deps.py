@@ -1,10 +1,17 @@
 import logging
+from multiprocessing import get_context
 
 from aiohttp import ClientSession
+from aiomisc import ProcessPoolExecutor
 from aiomisc_dependency import dependency, reset_store
 
 from yatracker_linker.args import Parser
+from yatracker_linker.capture import CaptureWriter
 from yatracker_linker.gitlab_client import GitlabClient
+from yatracker_linker.link_scheduler import LinkScheduler
+from yatracker_linker.merge_request_cache import MergeRequestCache
+from yatracker_linker.merge_request_loader import MergeRequestLoader
+from yatracker_linker.routing import RoutingRules
 from yatracker_linker.tracker_client import TrackerClient
 
 
@@ -21,6 +28,17 @@ async def st_client(parser: Parser):
         )
 
 
+def link_scheduler(parser: Parser, st_client: TrackerClient):
+    return LinkScheduler(
+        st_client=st_client,
+        concurrency=parser.tracker.link_concurrency,
+        weights={
+            'merge_request': parser.tracker.merge_request_weight,
+            'push': parser.tracker.push_weight,
+        }
+    )
+
+
 async def gitlab_client(parser: Parser):
     async with ClientSession(raise_for_status=True) as session:
         yield GitlabClient(
@@ -36,6 +54,61 @@ async def gitlab_favicon(gitlab_client: GitlabClient):
     return icon
 
 
+def merge_request_loader(parser: Parser, gitlab_client: GitlabClient):
+    if not parser.gitlab.graphql:
+        return None
+
+    return MergeRequestLoader(
+        gitlab_client=gitlab_client,
+        delay=parser.gitlab.graphql_batch_delay
+    )
+
+
+def merge_request_cache(parser: Parser):
+    return MergeRequestCache(ttl=parser.cache.ttl, max_size=parser.cache.size)
+
+
+async def capture_writer(parser: Parser):
+    if not parser.capture.path:
+        yield None
+        return
+
+    async with CaptureWriter(
+        path=parser.capture.path,
+        sample_rate=parser.capture.sample_rate,
+        redact_headers=parser.capture.redact_headers,
+        redact_fields=parser.capture.redact_fields
+    ) as writer:
+        log.info('Capturing gitlab events to %s', parser.capture.path)
+        yield writer
+
+
+def routing_rules(parser: Parser):
+    return RoutingRules(
+        event_kinds=parser.routing.event_kinds,
+        projects=parser.routing.projects,
+        ignore_projects=parser.routing.ignore_projects,
+        ignore_authors=parser.routing.ignore_authors,
+        ignore_bots=parser.routing.ignore_bots,
+        project_queues=parser.routing.project_queues
+    )
+
+
+async def parse_executor(parser: Parser):
+    if not parser.parse.processes:
+        yield None
+        return
+
+    # Workers are started lazily, when event loop and thread pool are
+    # already running, forking at that moment could deadlock on locks held
+    # by other threads
+    with ProcessPoolExecutor(
+        max_workers=parser.parse.processes,
+        mp_context=get_context('forkserver')
+    ) as executor:
+        yield executor
+
+
 def config_deps(args):
 
     @dependency
@@ -43,8 +116,14 @@ def config_deps(args):
         return args
 
     dependency(st_client)
+    dependency(link_scheduler)
     dependency(gitlab_client)
     dependency(gitlab_favicon)
+    dependency(merge_request_cache)
+    dependency(merge_request_loader)
+    dependency(capture_writer)
+    dependency(routing_rules)
+    dependency(parse_executor)
 
 
 def reset_deps():
@@ -1,9 +1,34 @@
-from typing import Mapping, Optional
+from datetime import datetime, timezone
+from typing import (
+    AsyncIterator, Collection, Dict, List, Mapping, Optional, Tuple,
+)
 
 from aiohttp import ClientSession, hdrs
 from yarl import URL
 
 
+NEXT_PAGE_HEADER = 'X-Next-Page'
+
+# Only fields used by ProxyView are requested
+GRAPHQL_MERGE_REQUEST_FIELDS = 'iid title state updatedAt author { username }'
+
+
+class GraphQLError(Exception):
+    pass
+
+
+def format_graphql_time(value: str) -> str:
+    """
+    Converts GraphQL Time (2023-04-01T12:00:00Z) to format used by REST API
+    (2023-04-01T12:00:00.000Z), so ProxyView returns the same value with
+    both APIs.
+    """
+    timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return timestamp.astimezone(timezone.utc).isoformat(
+        timespec='milliseconds'
+    ).replace('+00:00', 'Z')
+
+
 class GitlabClient:
     def __init__(self, session: ClientSession, url: URL, token: str):
         self._session = session
@@ -30,3 +55,79 @@ class GitlabClient:
         )
         async with self._session.get(url, headers=self._headers) as resp:
             return await resp.json()
+
+    async def get_merge_requests(
+        self,
+        merge_requests: Mapping[str, Collection[str]]
+    ) -> Dict[Tuple[str, str], Mapping]:
+        """
+        Fetches merge requests of several projects (path with namespace
+        mapped to merge request iids) with single GraphQL query. Returns
+        merge requests in REST API format, keyed by project path and iid.
+        Merge requests not found are absent in result.
+        """
+        definitions, fields = [], []
+        aliases: Dict[str, str] = {}
+        variables: Dict[str, str | List[str]] = {}
+        for index, (project_path, iids) in enumerate(merge_requests.items()):
+            aliases[f'p{index}'] = project_path
+            variables[f'p{index}'] = project_path
+            variables[f'i{index}'] = [str(iid) for iid in iids]
+            definitions.append(f'$p{index}: ID!, $i{index}: [String!]')
+            fields.append(
+                f'p{index}: project(fullPath: $p{index}) {{ '
+                f'mergeRequests(iids: $i{index}) {{ '
+                f'nodes {{ {GRAPHQL_MERGE_REQUEST_FIELDS} }} '
+                f'}} }}'
+            )
+        query = f'query({", ".join(definitions)}) {{ {" ".join(fields)} }}'
+
+        async with self._session.post(
+            f'{self._base_url}/api/graphql',
+            headers=self._headers,
+            json={'query': query, 'variables': variables}
+        ) as resp:
+            result = await resp.json()
+
+        if result.get('errors') and not result.get('data'):
+            raise GraphQLError(result['errors'])
+
+        found: Dict[Tuple[str, str], Mapping] = {}
+        for alias, project in (result.get('data') or {}).items():
+            if not project:
+                continue
+
+            for node in project['mergeRequests']['nodes']:
+                found[aliases[alias], str(node['iid'])] = {
+                    'iid': int(node['iid']),
+                    'title': node['title'],
+                    'state': node['state'],
+                    'updated_at': format_graphql_time(node['updatedAt']),
+                    'author': {'username': node['author']['username']},
+                }
+        return found
+
+    async def iter_merge_requests(
+        self,
+        project_id: str,
+        state: str = 'opened',
+        updated_after: Optional[datetime] = None,
+        per_page: int = 100
+    ) -> AsyncIterator[Mapping]:
+        """
+        Iterates over project merge requests using paginated list endpoint.
+        """
+        url = f'{self._base_url}/api/v4/projects/{project_id}/merge_requests'
+        params = {'state': state, 'per_page': str(per_page), 'page': '1'}
+        if updated_after is not None:
+            params['updated_after'] = updated_after.isoformat()
+
+        while params['page']:
+            async with self._session.get(
+                url, headers=self._headers, params=params
+            ) as resp:
+                merge_requests = await resp.json()
+                params['page'] = resp.headers.get(NEXT_PAGE_HEADER, '')
+
+            for merge_request in merge_requests:
+                yield merge_request
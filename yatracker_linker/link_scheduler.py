@@ -0,0 +1,120 @@
+import asyncio
+import heapq
+from dataclasses import dataclass
+from itertools import count
+from time import monotonic
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from yatracker_linker.tracker_client import TrackerClient
+
+
+DEFAULT_CONCURRENCY = 32
+
+# Merge request links are prioritized over bulk commit links
+DEFAULT_WEIGHTS = {
+    'merge_request': 4.0,
+    'push': 1.0,
+}
+
+LinkClass = Tuple[str, str]
+
+
+@dataclass
+class LinkClassStatistic:
+    queued: int = 0
+    sent: int = 0
+    delay_total: float = 0.0
+    delay_max: float = 0.0
+
+    @property
+    def delay_avg(self) -> float:
+        return self.delay_total / self.sent if self.sent else 0.0
+
+
+class LinkScheduler:
+    """
+    Limits number of simultaneous Tracker link requests and shares them
+    between projects and event kinds using weighted fair queuing, so bulk
+    push of one project does not delay links of other ones.
+    """
+
+    def __init__(
+        self,
+        st_client: TrackerClient,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        weights: Optional[Mapping[str, float]] = None
+    ):
+        if concurrency < 1:
+            raise ValueError(
+                f'Concurrency should be positive, got {concurrency!r}'
+            )
+
+        weights = DEFAULT_WEIGHTS if weights is None else weights
+        for kind, weight in weights.items():
+            if weight <= 0:
+                raise ValueError(
+                    f'Weight of {kind!r} should be positive, got {weight!r}'
+                )
+
+        self._st_client = st_client
+        self._concurrency = concurrency
+        self._weights = dict(weights)
+        self._running = 0
+        self._virtual_time = 0.0
+        self._last_finish: Dict[LinkClass, float] = {}
+        self._queue: List[Tuple[float, int, asyncio.Future]] = []
+        self._counter = count()
+        self.statistic: Dict[LinkClass, LinkClassStatistic] = {}
+
+    def _dispatch(self):
+        while self._queue and self._running < self._concurrency:
+            finish, _, waiter = heapq.heappop(self._queue)
+            # Waiter is cancelled if request was cancelled while queued
+            if waiter.done():
+                continue
+
+            self._virtual_time = finish
+            self._running += 1
+            waiter.set_result(None)
+
+    def _release(self):
+        self._running -= 1
+        self._dispatch()
+
+    async def link_issue(
+        self, key: str, remote_path: str, project: str, kind: str
+    ) -> bool:
+        link_class = (project, kind)
+        statistic = self.statistic.setdefault(
+            link_class, LinkClassStatistic()
+        )
+
+        finish = max(
+            self._virtual_time, self._last_finish.get(link_class, 0.0)
+        ) + 1 / self._weights.get(kind, 1.0)
+        self._last_finish[link_class] = finish
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (finish, next(self._counter), waiter))
+
+        enqueued_at = monotonic()
+        statistic.queued += 1
+        try:
+            self._dispatch()
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+        finally:
+            statistic.queued -= 1
+
+        delay = monotonic() - enqueued_at
+        statistic.sent += 1
+        statistic.delay_total += delay
+        statistic.delay_max = max(statistic.delay_max, delay)
+
+        try:
+            return await self._st_client.link_issue(key, remote_path)
+        finally:
+            self._release()
@@ -0,0 +1,95 @@
+from time import monotonic
+from typing import Dict, Mapping, Optional, Tuple
+
+
+CacheKey = Tuple[str, str]
+
+
+def get_proxy_fields(merge_request: Mapping) -> Mapping:
+    """
+    Returns only merge request fields used by ProxyView, so descriptions and
+    other large fields are not kept in memory.
+    """
+    return {
+        'title': merge_request['title'],
+        'author': {'username': merge_request['author']['username']},
+        'updated_at': merge_request['updated_at'],
+        'state': merge_request['state'],
+    }
+
+
+class MergeRequestCache:
+    """
+    In-memory storage for merge requests, shared by ProxyView and
+    MergeRequestWarmerService. Keys are project path with namespace (as it
+    appears in merge request URL) and merge request iid.
+
+    Merge request fetched before it was evicted may be outdated, so writers
+    take generation before fetching and pass it to put: items evicted after
+    that are not stored.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._items: Dict[CacheKey, Tuple[float, Mapping]] = {}
+        self._generation = 0
+        # Generations of the latest evictions, oldest are forgotten
+        self._evicted: Dict[CacheKey, int] = {}
+        self._forgotten_generation = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, project_path: str, iid: int | str) -> Optional[Mapping]:
+        key = (project_path, str(iid))
+        item = self._items.get(key)
+        if item is None:
+            return None
+
+        expires_at, merge_request = item
+        if expires_at < monotonic():
+            del self._items[key]
+            return None
+
+        return merge_request
+
+    def put(
+        self,
+        project_path: str,
+        iid: int | str,
+        merge_request: Mapping,
+        generation: Optional[int] = None
+    ):
+        key = (project_path, str(iid))
+        if generation is not None and (
+            generation < self._forgotten_generation or
+            self._evicted.get(key, 0) > generation
+        ):
+            return
+
+        # Re-insert key to keep dict ordered by last update time, so the
+        # oldest items are evicted first
+        self._items.pop(key, None)
+        while self._items and len(self._items) >= self._max_size:
+            del self._items[next(iter(self._items))]
+
+        self._items[key] = (
+            monotonic() + self._ttl, get_proxy_fields(merge_request)
+        )
+
+    def evict(self, project_path: str, iid: int | str):
+        key = (project_path, str(iid))
+        self._items.pop(key, None)
+
+        self._generation += 1
+        self._evicted.pop(key, None)
+        self._evicted[key] = self._generation
+        while len(self._evicted) > self._max_size:
+            self._forgotten_generation = self._evicted.pop(
+                next(iter(self._evicted))
+            )
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from http import HTTPStatus
+from typing import Dict, Iterator, List, Mapping, Optional, Set, Tuple
+from urllib.parse import quote_plus
+
+from aiohttp import ClientError, ClientResponseError
+
+from yatracker_linker.gitlab_client import GitlabClient, GraphQLError
+
+
+log = logging.getLogger(__name__)
+
+
+Batch = Dict[str, Dict[str, List[asyncio.Future]]]
+
+
+def iter_pending(batch: Batch) -> Iterator[Tuple[str, str, asyncio.Future]]:
+    for project_path, iids in batch.items():
+        for iid, futures in iids.items():
+            for future in futures:
+                # Future is cancelled if request was cancelled while waiting
+                if not future.done():
+                    yield project_path, iid, future
+
+
+class MergeRequestLoader:
+    """
+    Collects merge requests requested at about the same time (within delay
+    seconds) and fetches them with single GitlabClient.get_merge_requests
+    GraphQL query. If GraphQL query fails, merge requests are fetched with
+    REST API one by one, at most rest_concurrency at once.
+    """
+
+    def __init__(
+        self,
+        gitlab_client: GitlabClient,
+        delay: float = 0.005,
+        max_batch_size: int = 100,
+        max_batch_projects: int = 10,
+        rest_concurrency: int = 4
+    ):
+        self._gitlab_client = gitlab_client
+        self._delay = delay
+        # Gitlab returns up to 100 nodes for connection without pagination
+        self._max_batch_size = min(max_batch_size, 100)
+        # Each project is a separate field in query, their number is limited
+        # to keep query within Gitlab complexity limits
+        self._max_batch_projects = max_batch_projects
+        # Shared by all batches, so fallback does not flood Gitlab that
+        # is probably already overloaded
+        self._rest_semaphore = asyncio.Semaphore(rest_concurrency)
+        self._batch: Batch = {}
+        self._batch_size = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, project_path: str, iid: str) -> Optional[Mapping]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        if (
+            project_path not in self._batch and
+            len(self._batch) >= self._max_batch_projects
+        ):
+            self._flush()
+
+        futures = self._batch.setdefault(project_path, {}).setdefault(
+            str(iid), []
+        )
+        if not futures:
+            self._batch_size += 1
+        futures.append(future)
+
+        if self._batch_size >= self._max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._delay, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._batch, self._batch_size = self._batch, {}, 0
+        task = asyncio.create_task(self._fetch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, batch: Batch):
+        try:
+            merge_requests = await self._gitlab_client.get_merge_requests({
+                project_path: list(iids)
+                for project_path, iids in batch.items()
+            })
+        except (GraphQLError, ClientError):
+            log.warning(
+                'Unable to fetch merge requests with GraphQL, falling back '
+                'to REST API', exc_info=True
+            )
+            await asyncio.gather(*[
+                self._fetch_rest(project_path, iid, futures)
+                for project_path, iids in batch.items()
+                for iid, futures in iids.items()
+            ])
+            return
+        except Exception as e:
+            for _, _, future in iter_pending(batch):
+                future.set_exception(e)
+            return
+
+        for project_path, iid, future in iter_pending(batch):
+            future.set_result(merge_requests.get((project_path, iid)))
+
+    async def _fetch_rest(
+        self, project_path: str, iid: str, futures: List[asyncio.Future]
+    ):
+        pending = [future for future in futures if not future.done()]
+        if not pending:
+            return
+
+        merge_request: Optional[Mapping] = None
+        try:
+            async with self._rest_semaphore:
+                merge_request = await self._gitlab_client.get_merge_request(
+                    project_id=quote_plus(project_path), merge_request_id=iid
+                )
+        except Exception as e:
+            if not (
+                isinstance(e, ClientResponseError) and
+                e.status == HTTPStatus.NOT_FOUND
+            ):
+                for future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        for future in pending:
+            if not future.done():
+                future.set_result(merge_request)
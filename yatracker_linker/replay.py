@@ -0,0 +1,435 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from pathlib import Path
+from typing import (
+    Any, AsyncIterator, Dict, List, Optional, Sequence, Type,
+)
+from urllib.parse import unquote
+
+import argclass
+from aiohttp import ClientSession, hdrs
+from aiohttp.web import Application, Request, Response
+from aiomisc import ProcessPoolExecutor, entrypoint
+from aiomisc.service.aiohttp import AIOHTTPService
+from aiomisc.utils import bind_socket
+from aiomisc_log import LogFormat
+from yarl import URL
+
+from yatracker_linker.capture import CaptureRecord, read_capture
+from yatracker_linker.gitlab_client import GitlabClient
+from yatracker_linker.merge_request_cache import MergeRequestCache
+from yatracker_linker.merge_request_loader import MergeRequestLoader
+from yatracker_linker.routing import RoutingRules
+from yatracker_linker.service import HttpService
+from yatracker_linker.tracker_client import TrackerClient
+from yatracker_linker.views.base import GITLAB_TOKEN_HEADER
+from yatracker_linker.views.events import GitlabView
+
+
+log = logging.getLogger(__name__)
+
+# Headers set by client session itself
+SKIP_HEADERS = frozenset([
+    hdrs.CONTENT_LENGTH.lower(),
+    hdrs.HOST.lower(),
+    hdrs.TRANSFER_ENCODING.lower(),
+    hdrs.CONNECTION.lower(),
+    hdrs.ACCEPT_ENCODING.lower(),
+])
+
+
+class ReplayParser(argclass.Parser):
+    log_level: int = argclass.LogLevel
+    log_format: str = argclass.Argument(
+        choices=LogFormat.choices(),
+        default=LogFormat.default()
+    )
+    capture: Path = argclass.Argument(type=Path, required=True, help=(
+        'Capture file written by yatracker-linker with --capture-path'
+    ))
+    speed: float = argclass.Argument(default=1.0, help=(
+        'Replay speed multiplier relative to original timing, 0 sends all '
+        'events without delays'
+    ))
+    target: Optional[URL] = argclass.Argument(type=URL, help=(
+        'Events URL of linker instance to replay capture against. If not '
+        'specified, linker is started locally with stand-ins for Tracker '
+        'and Gitlab'
+    ))
+    token: Optional[str] = argclass.Argument(help=(
+        'Value for X-Gitlab-Token header (recorded one is redacted)'
+    ))
+    tracker_latency: float = argclass.Argument(default=0.0, help=(
+        'Seconds Tracker stand-in waits before responding'
+    ))
+    parse_offload_threshold: int = argclass.Argument(
+        default=256 * 1024, help=(
+            'Events larger than given number of bytes are parsed in executor '
+            'by local linker'
+        )
+    )
+    parse_processes: int = argclass.Argument(default=0, help=(
+        'Number of processes local linker parses large events in. Thread '
+        'pool is used if 0, it only reduces event loop lag, as parsing still '
+        'holds GIL'
+    ))
+
+
+class TrackerStandInService(AIOHTTPService):
+    latency: float = 0.0
+    requests: int = 0
+
+    async def handle_link(self, request: Request):
+        await request.read()
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return Response(status=201)
+
+    async def create_application(self):
+        app = Application()
+        app.router.add_route(
+            'POST', '/v2/issues/{key}/remotelinks', self.handle_link
+        )
+        return app
+
+
+class GitlabStandInService(AIOHTTPService):
+    """
+    Serves merge requests with REST and GraphQL API, counts requests and
+    sent bytes.
+    """
+    requests: int = 0
+    sent_bytes: int = 0
+
+    def get_merge_request(
+        self, project_path: str, iid: int
+    ) -> Dict[str, Any]:
+        """
+        Returns merge request in Gitlab REST API format.
+        """
+        return {
+            'iid': iid,
+            'title': f'TASK-{iid}: Stand-in merge request',
+            'author': {'username': 'stand-in'},
+            'updated_at': '1970-01-01T00:00:00.000Z',
+            'state': 'opened',
+        }
+
+    def json_response(self, data: Any) -> Response:
+        body = json.dumps(data).encode()
+        self.requests += 1
+        self.sent_bytes += len(body)
+        return Response(body=body, content_type='application/json')
+
+    async def handle_favicon(self, request: Request):
+        return Response()
+
+    async def handle_merge_request(self, request: Request):
+        return self.json_response(self.get_merge_request(
+            project_path=unquote(request.match_info['project_id']),
+            iid=int(request.match_info['merge_request_id'])
+        ))
+
+    async def handle_graphql(self, request: Request):
+        # Stand-in understands only queries built by
+        # GitlabClient.get_merge_requests: projects are passed as pN
+        # variables and their merge requests iids as iN variables
+        variables = (await request.json())['variables']
+        data = {}
+        for name, project_path in variables.items():
+            if not name.startswith('p'):
+                continue
+
+            nodes = []
+            for iid in variables[f'i{name[1:]}']:
+                merge_request = self.get_merge_request(project_path, int(iid))
+                nodes.append({
+                    'iid': iid,
+                    'title': merge_request['title'],
+                    'state': merge_request['state'],
+                    # GraphQL Time has no fractional seconds
+                    'updatedAt': '1970-01-01T00:00:00Z',
+                    'author': {
+                        'username': merge_request['author']['username']
+                    },
+                })
+            data[name] = {'mergeRequests': {'nodes': nodes}}
+        return self.json_response({'data': data})
+
+    async def create_application(self):
+        app = Application()
+        app.router.add_route('GET', '/favicon.ico', self.handle_favicon)
+        app.router.add_route(
+            'GET',
+            r'/api/v4/projects/{project_id}/merge_requests/'
+            r'{merge_request_id:\d+}',
+            self.handle_merge_request
+        )
+        app.router.add_route('POST', '/api/graphql', self.handle_graphql)
+        return app
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+@dataclass
+class ReplayReport:
+    duration: float = 0.0
+    errors: int = 0
+    latencies: List[float] = field(default_factory=list)
+    loop_lags: List[float] = field(default_factory=list)
+
+    @property
+    def events(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def throughput(self) -> float:
+        return self.events / self.duration if self.duration else 0.0
+
+    def __str__(self):
+        latency, lag = self.latencies, self.loop_lags
+        report = (
+            f'Events: {self.events}, errors: {self.errors}, '
+            f'duration: {self.duration:.3f}s, '
+            f'throughput: {self.throughput:.1f} events/s, '
+            f'latency p50: {percentile(latency, 0.5) * 1000:.1f}ms, '
+            f'p90: {percentile(latency, 0.9) * 1000:.1f}ms, '
+            f'p99: {percentile(latency, 0.99) * 1000:.1f}ms, '
+            f'max: {percentile(latency, 1) * 1000:.1f}ms'
+        )
+        # Loop lag is measured only for linker started locally
+        if lag:
+            report += (
+                f', loop lag p99: {percentile(lag, 0.99) * 1000:.1f}ms, '
+                f'max: {percentile(lag, 1) * 1000:.1f}ms'
+            )
+        return report
+
+
+@asynccontextmanager
+async def monitor_loop_lag(
+    loop_lags: List[float], interval: float = 0.005
+) -> AsyncIterator[None]:
+    """
+    Measures how late event loop wakes up after sleep. Linker started
+    locally shares event loop with replay, so lag shows how long request
+    handlers block the loop.
+    """
+    async def monitor():
+        while True:
+            started_at = time.monotonic()
+            await asyncio.sleep(interval)
+            loop_lags.append(
+                max(0.0, time.monotonic() - started_at - interval)
+            )
+
+    task = asyncio.create_task(monitor())
+    try:
+        yield
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def get_service_url(service: AIOHTTPService) -> URL:
+    host, port = service.socket.getsockname()[:2]
+    return URL.build(scheme='http', host=host, port=port)
+
+
+@dataclass
+class LocalLinker:
+    url: URL
+    tracker: TrackerStandInService
+    gitlab: GitlabStandInService
+
+    @property
+    def events_url(self) -> URL:
+        return self.url.with_path(GitlabView.URL_PATH)
+
+
+@asynccontextmanager
+async def run_local_linker(
+    tracker_latency: float = 0.0,
+    parse_offload_threshold: int = 256 * 1024,
+    parse_processes: int = 0,
+    graphql: bool = False,
+    cache_ttl: float = 60,
+    gitlab_tokens: frozenset[str] = frozenset(),
+    routing_rules: Optional[RoutingRules] = None,
+    gitlab_stand_in: Type[GitlabStandInService] = GitlabStandInService
+) -> AsyncIterator[LocalLinker]:
+    async with AsyncExitStack() as stack:
+        services: List[AIOHTTPService] = []
+
+        async def start(service: AIOHTTPService):
+            await service.start()
+            services.append(service)
+
+        def create_socket():
+            return bind_socket(address='127.0.0.1', port=0)
+
+        try:
+            tracker = TrackerStandInService(
+                sock=create_socket(), latency=tracker_latency
+            )
+            await start(tracker)
+            gitlab = gitlab_stand_in(sock=create_socket())
+            await start(gitlab)
+
+            st_session = await stack.enter_async_context(ClientSession())
+            gitlab_session = await stack.enter_async_context(
+                ClientSession(raise_for_status=True)
+            )
+            gitlab_client = GitlabClient(
+                session=gitlab_session,
+                url=get_service_url(gitlab),
+                token='stand-in'
+            )
+            parse_executor = None
+            if parse_processes:
+                parse_executor = stack.enter_context(
+                    ProcessPoolExecutor(
+                        max_workers=parse_processes,
+                        mp_context=get_context('forkserver')
+                    )
+                )
+            linker = HttpService(
+                sock=create_socket(),
+                gitlab_tokens=gitlab_tokens,
+                st_client=TrackerClient(
+                    session=st_session,
+                    url=get_service_url(tracker),
+                    token='stand-in',
+                    link_origin='stand-in'
+                ),
+                gitlab_client=gitlab_client,
+                gitlab_favicon=None,
+                merge_request_cache=MergeRequestCache(
+                    ttl=cache_ttl, max_size=1000
+                ),
+                merge_request_loader=(
+                    MergeRequestLoader(gitlab_client) if graphql else None
+                ),
+                parse_executor=parse_executor,
+                parse_offload_threshold=parse_offload_threshold,
+                routing_rules=routing_rules or RoutingRules()
+            )
+            await start(linker)
+
+            yield LocalLinker(
+                url=get_service_url(linker), tracker=tracker, gitlab=gitlab
+            )
+        finally:
+            for service in reversed(services):
+                await service.stop()
+
+
+async def send_records(
+    session: ClientSession,
+    target: URL,
+    records: Sequence[CaptureRecord],
+    speed: float,
+    token: Optional[str] = None
+) -> ReplayReport:
+    report = ReplayReport()
+    if not records:
+        return report
+
+    first_timestamp = records[0].timestamp
+    started_at = time.monotonic()
+
+    async def send(record: CaptureRecord):
+        if speed:
+            delay = (
+                started_at +
+                (record.timestamp - first_timestamp) / speed -
+                time.monotonic()
+            )
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        headers = {
+            name: value
+            for name, value in record.headers.items()
+            if name.lower() not in SKIP_HEADERS
+        }
+        if token is not None:
+            headers[GITLAB_TOKEN_HEADER] = token
+
+        sent_at = time.monotonic()
+        try:
+            async with session.post(
+                target, data=record.body.encode(), headers=headers
+            ) as resp:
+                await resp.read()
+                if not resp.ok:
+                    report.errors += 1
+        except Exception:
+            log.exception('Unable to send event to %s', target)
+            report.errors += 1
+        finally:
+            report.latencies.append(time.monotonic() - sent_at)
+
+    # Events are sent independently of responses, to preserve original
+    # bursts of traffic
+    await asyncio.gather(*[send(record) for record in records])
+    report.duration = time.monotonic() - started_at
+    return report
+
+
+async def replay(parser: ReplayParser) -> ReplayReport:
+    records = [record async for record in read_capture(parser.capture)]
+    log.info('Loaded %d events from %s', len(records), parser.capture)
+
+    loop_lags: List[float] = []
+    async with AsyncExitStack() as stack:
+        target = parser.target
+        local = target is None
+        if target is None:
+            linker = await stack.enter_async_context(
+                run_local_linker(
+                    tracker_latency=parser.tracker_latency,
+                    parse_offload_threshold=parser.parse_offload_threshold,
+                    parse_processes=parser.parse_processes
+                )
+            )
+            target = linker.events_url
+
+        session = await stack.enter_async_context(ClientSession())
+        if local:
+            await stack.enter_async_context(monitor_loop_lag(loop_lags))
+        report = await send_records(
+            session, target, records, parser.speed, parser.token
+        )
+
+    report.loop_lags = loop_lags
+    return report
+
+
+def main():
+    parser = ReplayParser(auto_env_var_prefix='YATRACKER_LINKER_REPLAY_')
+    parser.parse_args()
+
+    with entrypoint(
+        log_level=parser.log_level,
+        log_format=parser.log_format
+    ) as loop:
+        report = loop.run_until_complete(replay(parser))
+
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
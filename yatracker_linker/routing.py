@@ -0,0 +1,186 @@
+import re
+from typing import (
+    Dict, Generic, Iterable, Mapping, Optional, Tuple, TypeVar,
+)
+
+
+T = TypeVar('T')
+
+GITLAB_EVENT_HEADER = 'X-Gitlab-Event'
+
+# X-Gitlab-Event header values mapped to object_kind of event payload
+EVENT_KINDS = {
+    'Push Hook': 'push',
+    'Tag Push Hook': 'tag_push',
+    'Merge Request Hook': 'merge_request',
+    'Issue Hook': 'issue',
+    'Note Hook': 'note',
+    'Pipeline Hook': 'pipeline',
+    'Job Hook': 'build',
+    'Wiki Page Hook': 'wiki_page',
+    'Deployment Hook': 'deployment',
+    'Release Hook': 'release',
+}
+
+# Regular expressions to peek at event fields without decoding whole
+# payload. Gitlab puts project and user before commits and object attributes,
+# so first match is the one we need.
+PROJECT_PATH_PATTERN = re.compile(
+    rb'"path_with_namespace"\s*:\s*"((?:[^"\\]|\\.)*)"'
+)
+PUSH_AUTHOR_PATTERN = re.compile(rb'"user_username"\s*:\s*"((?:[^"\\]|\\.)*)"')
+MERGE_REQUEST_AUTHOR_PATTERN = re.compile(
+    rb'"user"\s*:\s*\{[^{}]*?"username"\s*:\s*"((?:[^"\\]|\\.)*)"'
+)
+
+# Users created by Gitlab for project and group access tokens, older Gitlab
+# versions add numeric suffix (project_1_bot1), newer ones hex one
+# (project_1_bot_f00d)
+BOT_PATTERN = re.compile(r'^(project|group)_\d+_bot(\d+|_[0-9a-f]+)?$')
+
+
+def peek(pattern: re.Pattern, body: bytes) -> Optional[str]:
+    if match := pattern.search(body):
+        return match.group(1).decode(errors='replace').replace('\\/', '/')
+    return None
+
+
+class PrefixTrieNode(Generic[T]):
+    __slots__ = ('children', 'value')
+
+    def __init__(self):
+        self.children: Dict[str, PrefixTrieNode[T]] = {}
+        self.value: Optional[T] = None
+
+
+class PrefixTrie(Generic[T]):
+    """
+    Maps project path prefixes (split by namespace) to values, e.g. prefix
+    "group/subgroup" matches "group/subgroup/project", but not
+    "group/subgroup-2/project".
+    """
+
+    def __init__(self, items: Iterable[Tuple[str, T]] = ()):
+        self._root: PrefixTrieNode[T] = PrefixTrieNode()
+        self._size = 0
+        for prefix, value in items:
+            self.add(prefix, value)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, prefix: str, value: T):
+        node = self._root
+        for part in prefix.strip('/').split('/'):
+            node = node.children.setdefault(part, PrefixTrieNode())
+        if node.value is None:
+            self._size += 1
+        node.value = value
+
+    def match(self, path: str) -> Optional[T]:
+        """
+        Returns value of the longest prefix matching path.
+        """
+        value = None
+        node = self._root
+        for part in path.strip('/').split('/'):
+            child = node.children.get(part)
+            if child is None:
+                break
+            node = child
+            if node.value is not None:
+                value = node.value
+        return value
+
+
+def parse_project_queues(values: Iterable[str]) -> Dict[str, frozenset[str]]:
+    """
+    Parses values like "group/project=QUEUE1,QUEUE2".
+    """
+    project_queues = {}
+    for value in values:
+        prefix, sep, queues = value.partition('=')
+        if not sep or not prefix or not queues:
+            raise ValueError(
+                f'Project queues should be like group/project=QUEUE1,QUEUE2, '
+                f'got {value!r}'
+            )
+        project_queues[prefix] = frozenset(
+            queue.strip().upper() for queue in queues.split(',')
+        )
+    return project_queues
+
+
+class RoutingRules:
+    """
+    Rules rejecting events linker is not interested in before event is
+    decoded and validated, and restricting Tracker queues issues could be
+    linked in.
+    """
+
+    def __init__(
+        self,
+        event_kinds: frozenset[str] = frozenset(),
+        projects: frozenset[str] = frozenset(),
+        ignore_projects: frozenset[str] = frozenset(),
+        ignore_authors: frozenset[str] = frozenset(),
+        ignore_bots: bool = False,
+        project_queues: Optional[Mapping[str, frozenset[str]]] = None
+    ):
+        self._event_kinds = event_kinds
+        # Longest matching prefix decides whether project is accepted, so
+        # ignored subgroup of allowed group (and vice versa) works as expected
+        self._projects: PrefixTrie[bool] = PrefixTrie(
+            [(prefix, True) for prefix in projects] +
+            [(prefix, False) for prefix in ignore_projects]
+        )
+        self._default_project_accepted = not projects
+        self._ignore_authors = ignore_authors
+        self._ignore_bots = ignore_bots
+        self._project_queues: PrefixTrie[frozenset[str]] = PrefixTrie(
+            (project_queues or {}).items()
+        )
+
+    def is_author_ignored(self, username: str) -> bool:
+        return username in self._ignore_authors or bool(
+            self._ignore_bots and BOT_PATTERN.match(username)
+        )
+
+    def is_project_accepted(self, project_path: str) -> bool:
+        accepted = self._projects.match(project_path)
+        if accepted is None:
+            return self._default_project_accepted
+        return accepted
+
+    def get_rejection_reason(
+        self, headers: Mapping[str, str], body: bytes
+    ) -> Optional[str]:
+        """
+        Checks event using headers and cheap peek at raw payload. Returns
+        reason if event should be ignored.
+        """
+        kind = EVENT_KINDS.get(headers.get(GITLAB_EVENT_HEADER, ''))
+        if self._event_kinds and kind and kind not in self._event_kinds:
+            return f'event kind {kind!r} is not allowed'
+
+        if self._projects:
+            project_path = peek(PROJECT_PATH_PATTERN, body)
+            if project_path and not self.is_project_accepted(project_path):
+                return f'project {project_path!r} is not allowed'
+
+        if self._ignore_authors or self._ignore_bots:
+            author = None
+            if kind != 'merge_request':
+                author = peek(PUSH_AUTHOR_PATTERN, body)
+            if author is None and kind != 'push':
+                author = peek(MERGE_REQUEST_AUTHOR_PATTERN, body)
+            if author and self.is_author_ignored(author):
+                return f'author {author!r} is ignored'
+
+        return None
+
+    def is_issue_allowed(self, project_path: str, issue: str) -> bool:
+        queues = self._project_queues.match(project_path)
+        if queues is None:
+            return True
+        return issue.partition('-')[0] in queues
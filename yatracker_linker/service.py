@@ -1,33 +1,142 @@
+import asyncio
+import logging
+from concurrent.futures import Executor
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from urllib.parse import quote_plus
+
 from aiohttp import web
 from aiomisc.service.aiohttp import AIOHTTPService
+from aiomisc.service.periodic import PeriodicService
 
+from yatracker_linker.capture import CaptureWriter
 from yatracker_linker.gitlab_client import GitlabClient
+from yatracker_linker.link_scheduler import LinkScheduler
+from yatracker_linker.merge_request_cache import MergeRequestCache
+from yatracker_linker.merge_request_loader import MergeRequestLoader
+from yatracker_linker.routing import RoutingRules
 from yatracker_linker.tracker_client import TrackerClient
 from yatracker_linker.views.events import GitlabView
 from yatracker_linker.views.proxy import ProxyView
+from yatracker_linker.views.stats import LinkStatsView
+
+
+log = logging.getLogger(__name__)
 
 
 class HttpService(AIOHTTPService):
     __dependencies__ = (
         'st_client',
+        'link_scheduler',
         'gitlab_client',
         'gitlab_favicon',
+        'merge_request_cache',
+        'merge_request_loader',
+        'capture_writer',
+        'routing_rules',
+        'parse_executor',
     )
     __required__ = ('gitlab_tokens', )
 
     gitlab_tokens: frozenset[str]
     st_client: TrackerClient
+    # If not specified, links are sent with default scheduler settings
+    link_scheduler: Optional[LinkScheduler] = None
     gitlab_client: GitlabClient
     gitlab_favicon: str
+    merge_request_cache: MergeRequestCache
+    # If not specified, merge requests are fetched with REST API one by one
+    merge_request_loader: Optional[MergeRequestLoader] = None
+    capture_writer: Optional[CaptureWriter] = None
+    routing_rules: RoutingRules = RoutingRules()
+    # None means default event loop executor (thread pool)
+    parse_executor: Optional[Executor] = None
+    parse_offload_threshold: int = 256 * 1024
+    client_max_size: int = 32 * 1024 * 1024
 
     async def create_application(self):
-        app = web.Application()
+        app = web.Application(client_max_size=self.client_max_size)
         app.router.add_route('POST', GitlabView.URL_PATH, GitlabView)
+        app.router.add_route('GET', LinkStatsView.URL_PATH, LinkStatsView)
         app.router.add_route('GET', ProxyView.URL_PATH, ProxyView)
 
         app['gitlab_tokens'] = self.gitlab_tokens
         app['st_client'] = self.st_client
+        app['link_scheduler'] = self.link_scheduler or LinkScheduler(
+            st_client=self.st_client
+        )
         app['gitlab_client'] = self.gitlab_client
         app['gitlab_favicon'] = self.gitlab_favicon
+        app['merge_request_cache'] = self.merge_request_cache
+        app['merge_request_loader'] = self.merge_request_loader
+        app['capture_writer'] = self.capture_writer
+        app['routing_rules'] = self.routing_rules
+        app['parse_executor'] = self.parse_executor
+        app['parse_offload_threshold'] = self.parse_offload_threshold
 
         return app
+
+
+class MergeRequestWarmerService(PeriodicService):
+    """
+    Periodically prefetches opened and recently updated merge requests of
+    configured projects into cache, used by ProxyView.
+    """
+    __dependencies__ = (
+        'gitlab_client',
+        'merge_request_cache',
+    )
+    __required__ = ('projects', )
+
+    projects: frozenset[str]
+    concurrency: int = 4
+    updated_within: float = 86400
+    gitlab_client: GitlabClient
+    merge_request_cache: MergeRequestCache
+
+    async def callback(self):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def warm(project_path: str):
+            async with semaphore:
+                try:
+                    await self.warm_project(project_path)
+                except Exception:
+                    log.exception(
+                        'Unable to prefetch merge requests for project %r',
+                        project_path
+                    )
+
+        await asyncio.gather(*[warm(project) for project in self.projects])
+
+    async def warm_project(self, project_path: str):
+        project_id = quote_plus(project_path)
+        updated_after = (
+            datetime.now(timezone.utc) -
+            timedelta(seconds=self.updated_within)
+        )
+
+        # Recently updated opened merge requests are already listed with
+        # all opened ones, so only finished ones are listed separately
+        merge_requests = 0
+        generation = self.merge_request_cache.generation
+        for iterator in (
+            self.gitlab_client.iter_merge_requests(project_id, state='opened'),
+            self.gitlab_client.iter_merge_requests(
+                project_id, state='merged', updated_after=updated_after
+            ),
+            self.gitlab_client.iter_merge_requests(
+                project_id, state='closed', updated_after=updated_after
+            ),
+        ):
+            async for merge_request in iterator:
+                self.merge_request_cache.put(
+                    project_path, merge_request['iid'], merge_request,
+                    generation
+                )
+                merge_requests += 1
+
+        log.debug(
+            'Prefetched %d merge requests for project %r',
+            merge_requests, project_path
+        )
@@ -1,12 +1,29 @@
-from aiohttp.web import Application, View
+from concurrent.futures import Executor
+from typing import Optional
 
+from aiohttp.web import Application, HTTPUnauthorized, View
+
+from yatracker_linker.capture import CaptureWriter
 from yatracker_linker.gitlab_client import GitlabClient
+from yatracker_linker.link_scheduler import LinkScheduler
+from yatracker_linker.merge_request_cache import MergeRequestCache
+from yatracker_linker.merge_request_loader import MergeRequestLoader
+from yatracker_linker.routing import RoutingRules
 from yatracker_linker.tracker_client import TrackerClient
 
 
+GITLAB_TOKEN_HEADER = 'X-Gitlab-Token'
+
+
 class BaseView(View):
     URL_PATH = '/gitlab'
 
+    def assert_authorized(self):
+        if self.gitlab_tokens:
+            token = self.request.headers.get(GITLAB_TOKEN_HEADER)
+            if token not in self.gitlab_tokens:
+                raise HTTPUnauthorized
+
     @property
     def app(self) -> Application:
         return self.request.app
@@ -19,10 +36,38 @@ class BaseView(View):
     def st_client(self) -> TrackerClient:
         return self.request.app['st_client']
 
+    @property
+    def link_scheduler(self) -> LinkScheduler:
+        return self.request.app['link_scheduler']
+
     @property
     def gitlab_client(self) -> GitlabClient:
         return self.request.app['gitlab_client']
 
+    @property
+    def merge_request_loader(self) -> Optional[MergeRequestLoader]:
+        return self.request.app['merge_request_loader']
+
     @property
     def gitlab_favicon(self) -> str:
         return self.request.app['gitlab_favicon']
+
+    @property
+    def merge_request_cache(self) -> MergeRequestCache:
+        return self.request.app['merge_request_cache']
+
+    @property
+    def capture_writer(self) -> Optional[CaptureWriter]:
+        return self.request.app['capture_writer']
+
+    @property
+    def routing_rules(self) -> RoutingRules:
+        return self.request.app['routing_rules']
+
+    @property
+    def parse_executor(self) -> Optional[Executor]:
+        return self.request.app['parse_executor']
+
+    @property
+    def parse_offload_threshold(self) -> int:
+        return self.request.app['parse_offload_threshold']
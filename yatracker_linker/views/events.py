@@ -4,18 +4,20 @@ import logging
 import re
 from dataclasses import asdict, dataclass
 from functools import partial
-from typing import List, Literal
+from typing import List, Literal, Optional
 
-from aiohttp.web import HTTPBadRequest, HTTPUnauthorized, json_response
+from aiohttp.web import HTTPBadRequest, json_response
 from pydantic import BaseModel
 from pydantic.error_wrappers import ValidationError
 from pydantic.fields import Field
 
 from yatracker_linker.views.base import BaseView
+from yatracker_linker.views.base import (  # noqa: F401
+    GITLAB_TOKEN_HEADER as GITLAB_TOKEN_HEADER,
+)
 
 
 PATTERN = re.compile(r'(?P<ticket>[a-z0-9]+-[0-9]+)', flags=re.IGNORECASE)
-GITLAB_TOKEN_HEADER = 'X-Gitlab-Token'
 
 log = logging.getLogger(__name__)
 
@@ -52,6 +54,7 @@ class CommitModel(BaseModel):
 
 
 class ObjectAttributesModel(BaseModel):
+    iid: Optional[int] = None
     url: str
     source_branch: str
     target_branch: str
@@ -131,34 +134,90 @@ def get_relative_url_path(url, project_path_with_namespace):
     return url[index:]
 
 
+@dataclass
+class ParsedEvent:
+    kind: str
+    project_path: str
+    items_to_link: List[LinkItem]
+    merge_request_iid: Optional[int] = None
+
+
+def parse_event(body: bytes) -> Optional[ParsedEvent]:
+    """
+    Decodes and validates event, extracts items to link. Returns None for
+    unknown events. Defined at module level to be runnable in process pool.
+    """
+    data = json.loads(body)
+    log.debug('Received event %r', data)
+    try:
+        event = EventModel(event=data).event
+    except ValidationError:
+        return None
+
+    merge_request_iid = None
+    if isinstance(event, MergeRequestEventModel):
+        merge_request_iid = event.object_attributes.iid
+
+    return ParsedEvent(
+        kind=event.object_kind,
+        project_path=event.project.path_with_namespace,
+        items_to_link=event.get_items_to_link(),
+        merge_request_iid=merge_request_iid
+    )
+
+
 class GitlabView(BaseView):
     URL_PATH = '/gitlab'
 
-    def assert_authorized(self):
-        if self.gitlab_tokens:
-            token = self.request.headers.get(GITLAB_TOKEN_HEADER)
-            if token not in self.gitlab_tokens:
-                raise HTTPUnauthorized
-
-    async def get_event(self) -> PushEventModel | MergeRequestEventModel:
-        try:
-            data = await self.request.json()
-            log.debug('Received event %r', data)
-            return EventModel(event=data).event
-        except ValidationError:
+    async def parse_event(self, body: bytes) -> ParsedEvent:
+        # Large events are parsed in executor, so decoding and validation
+        # do not block other requests
+        if len(body) < self.parse_offload_threshold:
+            event = parse_event(body)
+        else:
+            event = await asyncio.get_running_loop().run_in_executor(
+                self.parse_executor, parse_event, body
+            )
+
+        if event is None:
             raise HTTPBadRequest(text='Unknown object kind')
+        return event
 
     async def post(self):
         try:
             self.assert_authorized()
 
-            event = await self.get_event()
-            items_to_link = event.get_items_to_link()
+            body = await self.request.read()
+            if self.capture_writer and self.capture_writer.should_record():
+                self.capture_writer.record(self.request.headers, body)
+
+            if reason := self.routing_rules.get_rejection_reason(
+                self.request.headers, body
+            ):
+                log.debug('Ignored event: %s', reason)
+                return json_response([])
+
+            event = await self.parse_event(body)
+            if event.merge_request_iid is not None:
+                # Merge request was changed, proxy should fetch it again
+                self.merge_request_cache.evict(
+                    event.project_path, event.merge_request_iid
+                )
+
+            items_to_link = [
+                item for item in event.items_to_link
+                if self.routing_rules.is_issue_allowed(
+                    event.project_path, item.issue
+                )
+            ]
 
             linked_items = []
             if items_to_link:
                 link_results = await asyncio.gather(*[
-                    self.st_client.link_issue(item.issue, item.path)
+                    self.link_scheduler.link_issue(
+                        item.issue, item.path,
+                        project=event.project_path, kind=event.kind
+                    )
                     for item in items_to_link
                 ])
                 linked_items = [
@@ -1,10 +1,12 @@
 import logging
 from http import HTTPStatus
+from typing import Mapping
 from urllib.parse import quote_plus
 
 from aiohttp.client_exceptions import ClientResponseError
 from aiohttp.web import HTTPNotFound, json_response
 
+from yatracker_linker.gitlab_client import GraphQLError
 from yatracker_linker.views.base import BaseView
 
 
@@ -14,17 +16,24 @@ log = logging.getLogger(__name__)
 class ProxyView(BaseView):
     URL_PATH = r'/{project_id:.*}/-/merge_requests/{merge_request_id:\d+}'
 
-    async def get(self):
-        project_id = self.request.match_info['project_id']
-        merge_request_id = self.request.match_info['merge_request_id']
-
+    async def fetch_merge_request(
+        self, project_id: str, merge_request_id: str
+    ) -> Mapping:
         try:
-            merge_request = await self.gitlab_client.get_merge_request(
-                project_id=quote_plus(project_id),
-                merge_request_id=merge_request_id,
+            if self.merge_request_loader is None:
+                return await self.gitlab_client.get_merge_request(
+                    project_id=quote_plus(project_id),
+                    merge_request_id=merge_request_id,
+                )
+
+            merge_request = await self.merge_request_loader.load(
+                project_id, merge_request_id
             )
-        except ClientResponseError as e:
-            if e.status == HTTPStatus.NOT_FOUND:
+        except (ClientResponseError, GraphQLError) as e:
+            if (
+                isinstance(e, ClientResponseError) and
+                e.status == HTTPStatus.NOT_FOUND
+            ):
                 raise HTTPNotFound()
 
             log.exception(
@@ -33,6 +42,26 @@ class ProxyView(BaseView):
             )
             raise
 
+        if merge_request is None:
+            raise HTTPNotFound()
+        return merge_request
+
+    async def get(self):
+        project_id = self.request.match_info['project_id']
+        merge_request_id = self.request.match_info['merge_request_id']
+
+        merge_request = self.merge_request_cache.get(
+            project_id, merge_request_id
+        )
+        if merge_request is None:
+            generation = self.merge_request_cache.generation
+            merge_request = await self.fetch_merge_request(
+                project_id, merge_request_id
+            )
+            self.merge_request_cache.put(
+                project_id, merge_request_id, merge_request, generation
+            )
+
         data = {
             'key': self.request.url.path,
             'summary': merge_request['title'],
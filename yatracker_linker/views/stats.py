@@ -0,0 +1,25 @@
+from aiohttp.web import json_response
+
+from yatracker_linker.views.base import BaseView
+
+
+class LinkStatsView(BaseView):
+    URL_PATH = '/stats/links'
+
+    async def get(self):
+        # Statistic reveals project paths, so it is protected with the same
+        # tokens as gitlab events
+        self.assert_authorized()
+        return json_response([
+            {
+                'project': project,
+                'kind': kind,
+                'queued': statistic.queued,
+                'sent': statistic.sent,
+                'delay_avg': statistic.delay_avg,
+                'delay_max': statistic.delay_max,
+            }
+            for (project, kind), statistic in sorted(
+                self.link_scheduler.statistic.items()
+            )
+        ])